@@ -4,6 +4,7 @@ import os
 import re
 from typing import List
 from utils.ui_helper import UIHelper
+from utils.document_loader import DocumentLoader
 
 
 class DocumentUploader:
@@ -27,7 +28,9 @@ class DocumentUploader:
     def get_uploaded_files(self, upload_dir: str) -> List[str]:
         """Return list of markdown files in upload directory."""
         try:
-            return [f for f in os.listdir(upload_dir) if f.endswith(".md")]
+            with os.scandir(upload_dir) as it:
+                return [entry.name for entry in it
+                        if entry.name.endswith(".md") and entry.is_file()]
         except FileNotFoundError:
             return []
         except Exception as e:
@@ -96,8 +99,13 @@ class DocumentUploader:
         if uploaded_file is None:
             return
         file_path = os.path.join(upload_dir, uploaded_file.name)
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        # The uploader keeps its file across reruns; only write (and drop
+        # cached documents) the first time this upload is seen.
+        if st.session_state.get("last_upload_id") != uploaded_file.file_id:
+            with open(file_path, "wb") as f:
+                f.write(uploaded_file.getbuffer())
+            DocumentLoader.invalidate()
+            st.session_state["last_upload_id"] = uploaded_file.file_id
         st.success("✅ Upload successful!")
         file_content = uploaded_file.getvalue().decode("utf-8")
         self.extract_and_render_mermaid_blocks(file_content)
@@ -1,18 +1,23 @@
 import streamlit as st  # type: ignore
+import hashlib
 import re
-import os
 import time
 from autogen import ConversableAgent, UserProxyAgent  # type: ignore
 from autogen.code_utils import content_str  # type: ignore
-from typing import Dict, List  # type: ignore
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterator, List  # type: ignore
 from utils.ui_helper import UIHelper
 from utils.llm_setup import LLMSetup   # type: ignore
+from utils.document_loader import DocumentLoader
 
 
 class Config:
     """Configuration class for API keys and constants."""
     GEMINI1_API_KEY, GEMINI2_API_KEY = LLMSetup.load_api_keys()
     SEED = 42
+    MAX_HISTORY = 200
+    RESPONSE_CACHE_SIZE = 64
+    USER_IMAGE = "https://www.w3schools.com/howto/img_avatar.png"
     ORG_KEYWORDS = ["org", "organization", "structure",
                     "team", "manager", "lead", "report",
                     "department", "chart"]
@@ -25,33 +30,64 @@ class Config:
         "no relevant answer",
         "I apologize"
     ]
+    # Keyword lookups for org classification: O(1) set membership per
+    # token, with a prefix check so "reports" or "teams" still match.
+    ORG_SET = frozenset(ORG_KEYWORDS)
+    ORG_PREFIXES = tuple(ORG_KEYWORDS)
+    # Single-pass matcher, compiled once instead of one scan per phrase
+    TERMINATION_PATTERN = re.compile(
+        "|".join(map(re.escape, TERMINATION_PHRASES)), re.IGNORECASE
+    )
 
 
-class DocumentLoader:
-    """Handles loading of markdown documents from specified directories."""
-    @staticmethod
-    def load_documents() -> Dict[str, Dict[str, str]]:
-        base_dirs = {
-            "personal": "uploaded_docs/personal",
-            "org": "uploaded_docs/org"
-        }
-        docs = {"personal": {}, "org": {}}
-        for category, path in base_dirs.items():
-            if os.path.exists(path):
-                for fname in os.listdir(path):
-                    if fname.endswith(".md"):
-                        with open(os.path.join(path, fname), "r",
-                                  encoding="utf-8") as f:
-                            docs[category][fname] = f.read()
-        return docs
+_WORD_RE = re.compile(r"\w+")
+# Body is matched as runs of non-backtick text separated by lone backticks
+# (an unrolled loop), so the scan stops at the first closing fence without
+# the per-character backtracking of a lazy DOTALL match.
+_MERMAID_RE = re.compile(r"```mermaid\n([^`]*(?:`(?!``)[^`]*)*)```")
+# Prompt/reference material that must not be echoed back to the user
+_BLOCK_RE = re.compile(
+    r"```mermaid|# personal|based on the following|use the following",
+    re.IGNORECASE
+)
+# Leading "[CATEGORY: org|personal]" tag emitted by the combined prompt
+_CATEGORY_RE = re.compile(r"\s*\[CATEGORY:\s*(org|personal)\]\s*",
+                          re.IGNORECASE)
+
+
+def _has_termination_phrase(text: str) -> bool:
+    return Config.TERMINATION_PATTERN.search(text) is not None
+
+
+def _is_termination_msg(msg: Dict) -> bool:
+    return _has_termination_phrase(content_str(msg.get("content", "")))
 
 
 class MermaidExtractor:
     """Extracts Mermaid code blocks from markdown content."""
     @staticmethod
     def extract_mermaid_blocks(markdown_text: str) -> List[str]:
-        pattern = r"```mermaid\n(.*?)```"
-        return re.findall(pattern, markdown_text, re.DOTALL)
+        return _MERMAID_RE.findall(markdown_text)
+
+    @staticmethod
+    def iter_mermaid_blocks(markdown_text: str) -> Iterator[str]:
+        """Yield Mermaid blocks lazily, without building a list."""
+        for match in _MERMAID_RE.finditer(markdown_text):
+            yield match.group(1)
+
+    @staticmethod
+    @st.cache_data(show_spinner=False, max_entries=128)
+    def extract_diagrams(markdown_text: str) -> str:
+        """Return the document's Mermaid blocks as fenced markdown.
+
+        Cached on the document content with ``st.cache_data``, which is
+        shared by all sessions in the process, so an unchanged document is
+        parsed once rather than once per message.
+        """
+        return "\n\n".join(
+            f"```mermaid\n{block}\n```"
+            for block in MermaidExtractor.iter_mermaid_blocks(markdown_text)
+        )
 
 
 class AgentFactory:
@@ -89,96 +125,138 @@ class AgentFactory:
     @staticmethod
     def create_user_proxy() -> UserProxyAgent:
         return LLMSetup.create_user_proxy(
-            is_termination_msg=lambda x: any(
-                phrase in content_str(x.get("content", "")).lower()
-                for phrase in Config.TERMINATION_PHRASES
-            )
+            is_termination_msg=_is_termination_msg
         )
 
 
 class ChatManager:
     """Manages chat interactions and history."""
+    _AVATAR = {
+        "user_proxy": "🧠",
+        "user": "👩‍💼",
+        "TextRAG_Agent": "👩‍💼",
+        "GraphRAG_Agent": "👩‍💼",
+    }
+
     def __init__(self):
-        self.graph_agent = AgentFactory.create_graph_agent()
-        self.text_agent = AgentFactory.create_text_agent()
-        self.user_proxy = AgentFactory.create_user_proxy()
+        # Agents hold per-chat message state, so they are built once per
+        # session (reused across reruns) rather than shared between users.
+        if 'rag_agents' not in st.session_state:
+            st.session_state.rag_agents = (
+                AgentFactory.create_graph_agent(),
+                AgentFactory.create_text_agent(),
+                AgentFactory.create_user_proxy(),
+            )
+        self.graph_agent, self.text_agent, self.user_proxy = (
+            st.session_state.rag_agents
+        )
         self.user_name = "OMT Project Management Office, Business Planning"
         self.assistant_avatar = "🧠"
-        self.user_avatar = "https://www.w3schools.com/howto/img_avatar.png"
+        self.user_avatar = Config.USER_IMAGE
         self.placeholderstr = "Chat with On-boarding Mentor to start on-boarding"
         
         if 'rag_messages' not in st.session_state:
             st.session_state.rag_messages = []
+        if 'rag_response_cache' not in st.session_state:
+            st.session_state.rag_response_cache = OrderedDict()
 
-    def should_stop(self, chat_history: List[Dict]) -> bool:
-        agent_roles = ["TextRAG_Agent", "GraphRAG_Agent"]
+    @staticmethod
+    def should_stop(chat_history: List[Dict]) -> bool:
+        agent_roles = {"TextRAG_Agent", "GraphRAG_Agent"}
+        # autogen records the agent in "name" and uses "assistant"/"user"
+        # roles; fallback messages added here carry the agent as "role".
         last_few = [
-            msg["content"].strip().lower()
+            content_str(msg.get("content", ""))
             for msg in chat_history[-3:]
-            if msg["role"] in agent_roles
+            if msg.get("name") in agent_roles or msg.get("role") in agent_roles
         ]
-        generic_phrases = Config.TERMINATION_PHRASES
-        return all(any(generic in resp
-                       for generic in generic_phrases)for resp in last_few)
+        return bool(last_few) and all(map(_has_termination_phrase, last_few))
 
     def _get_avatar(self, role: str) -> str:
-        if role == "user_proxy":
-            return "🧠"
-        elif role == "user":
-            return "👩‍💼"
-        elif role in ["TextRAG_Agent", "GraphRAG_Agent"]:
-            return "👩‍💼"
-        else:
-            return Config.USER_IMAGE
-
-    def stream_response(self, text: str):
-        for word in text.split():
-            yield word + " "
-            time.sleep(0.03)
-
-    def generate_response(self, prompt: str) -> List[Dict]:
-        docs = DocumentLoader.load_documents()
-        prompt_lower = prompt.lower()
-        is_org_related = any(keyword in prompt_lower for
-                             keyword in Config.ORG_KEYWORDS)
-        if is_org_related:
-            mermaid_blocks = []
-            for content in docs.get("org", {}).values():
-                mermaid_blocks += MermaidExtractor.extract_mermaid_blocks(
-                    content
-                )
-            mermaid_diagrams = "\n\n".join(f"```mermaid\n{block}\n```"
-                                           for block in mermaid_blocks)
-            final_prompt = (
-                "Based on the following organization charts,"
-                "answer the user's question."
-                "Only use this information to determine reporting lines,"
-                "structure, or team relationships."
-                "Do not include any Mermaid diagrams or"
-                "raw reference material in your response:\n\n"
-                f"{mermaid_diagrams}\n\nUser's question: {prompt}"
-            )
+        return self._AVATAR.get(role, Config.USER_IMAGE)
 
-            # Run the chat with history
+    @staticmethod
+    def _display_role(entry: Dict) -> str:
+        # autogen records agent replies with a "user" role and the agent in
+        # "name"; show them as that agent so they render as answers.
+        name = entry.get("name")
+        if name in ("TextRAG_Agent", "GraphRAG_Agent"):
+            return name
+        return entry.get("role", "assistant")
+
+    def stream_response(self, text: str, step: int = 10):
+        words = text.split()
+        delay = 0 if st.session_state.get("fast_mode") else 0.01
+        for i in range(0, len(words), step):
+            yield " ".join(words[i:i + step]) + " "
+            if delay:
+                time.sleep(delay)
+
+    def _chat(self, agent: ConversableAgent, message: str) -> List[Dict]:
+        """Run a single-turn chat, reusing the reply to an identical prompt.
+
+        The prompt embeds the referenced documents, so editing or uploading
+        a document changes the key and bypasses stale entries.
+        """
+        cache = st.session_state.rag_response_cache
+        key = (agent.name, hashlib.sha1(message.encode("utf-8")).hexdigest())
+        history = cache.get(key)
+        if history is not None:
+            cache.move_to_end(key)
+        else:
             response = self.user_proxy.initiate_chat(
-                self.graph_agent,
-                message=final_prompt,
+                agent,
+                message=message,
                 summary_method="reflection_with_llm",
                 max_turns=1
             )
+            history = tuple(dict(msg) for msg in response.chat_history)
+            # Unhelpful replies are not cached, so asking again retries
+            if not self.should_stop(history):
+                cache[key] = history
+                if len(cache) > Config.RESPONSE_CACHE_SIZE:
+                    cache.popitem(last=False)
+        # Callers post-process messages in place, so hand out copies
+        return [dict(msg) for msg in history]
 
-            if self.should_stop(response.chat_history):
-                response.chat_history.append({
-                    "role": self.graph_agent.name,
-                    "content": "Ending the chat as "
-                    "no relevant answer can be provided."
-                })
+    @staticmethod
+    def tokenize(prompt: str) -> FrozenSet[str]:
+        """Lowercase and split a prompt once for all keyword checks."""
+        return frozenset(_WORD_RE.findall(prompt.lower()))
 
-        else:
-            personal_content = "\n\n".join(
-                f"# {fname}\n{content}"
-                for fname, content in docs.get("personal", {}).items()
+    @staticmethod
+    def is_org_related(tokens: FrozenSet[str]) -> bool:
+        if not tokens.isdisjoint(Config.ORG_SET):
+            return True
+        return any(token.startswith(Config.ORG_PREFIXES) for token in tokens)
+
+    def generate_response(self, prompt: str) -> List[Dict]:
+        tokens = self.tokenize(prompt)
+        is_org_related = self.is_org_related(tokens)
+        personal_content = DocumentLoader.load_sections("personal")
+        if is_org_related:
+            # Org keywords are ambiguous ("report", "team", ...), so let the
+            # model pick the relevant source and answer in one round-trip.
+            mermaid_diagrams = "\n\n".join(filter(None, (
+                MermaidExtractor.extract_diagrams(content)
+                for content in DocumentLoader.load_category("org").values()
+            )))
+            agent = self.graph_agent
+            final_prompt = (
+                "Based on the following organization charts and personal "
+                "notes, answer the user's question. "
+                "First decide whether the question is about the "
+                "organization (reporting lines, structure, or team "
+                "relationships) or about the personal notes, and start "
+                "your reply with [CATEGORY: org] or [CATEGORY: personal]. "
+                "Then answer using only the matching material. "
+                "Do not include any Mermaid diagrams, raw personal notes "
+                "or reference material in your response:\n\n"
+                f"{mermaid_diagrams}\n\n{personal_content}\n\n"
+                f"User's question: {prompt}"
             )
+        else:
+            agent = self.text_agent
             final_prompt = (
                 "Use the following personal notes to"
                 "answer the user's question."
@@ -187,42 +265,50 @@ class ChatManager:
                 f"{personal_content}\n\nUser's question: {prompt}"
             )
 
-            response = self.user_proxy.initiate_chat(
-                self.text_agent,
-                message=final_prompt,
-                summary_method="reflection_with_llm",
-                max_turns=1
-            )
-
-            if self.should_stop(response.chat_history):
-                response.chat_history.append({
-                    "role": self.text_agent.name,
-                    "content": "Ending the chat as no helpful"
-                    "answer can be provided."
-                })
+        chat_history = self._chat(agent, final_prompt)
+        for msg in chat_history:
+            content = msg.get("content")
+            match = (_CATEGORY_RE.match(content)
+                     if isinstance(content, str) else None)
+            if match:
+                msg["content"] = content[match.end():]
+                # Attribute the reply to the agent matching its source
+                if match.group(1).lower() == "personal":
+                    msg["name"] = self.text_agent.name
+
+        if self.should_stop(chat_history):
+            chat_history.append({
+                "role": agent.name,
+                "content": "Ending the chat as "
+                "no relevant answer can be provided."
+            })
 
         # Clean history
         filtered_history = [
-            msg for msg in response.chat_history
-            if not any(keyword in msg.get("content", "").lower()
-                       for keyword in [
-                "```mermaid", "# personal", "based on the following",
-                "use the following"
-            ])
+            msg for msg in chat_history
+            if not _BLOCK_RE.search(msg.get("content", ""))
         ]
         return filtered_history
 
     def show_chat_history(self, chat_history: List[Dict], container) -> None:
+        batch = []
         for i, entry in enumerate(chat_history):
-            role = entry.get("role", "assistant")
             content = entry.get("content", "").strip()
             if not content:
                 continue
+            role = self._display_role(entry)
+            batch.append((i, {"role": role, "content": content,
+                              "avatar": self._get_avatar(role)}))
 
-            avatar = self._get_avatar(role)
-            st.session_state.rag_messages.append({"role": role,
-                                                  "content": content,
-                                                  "avatar": avatar})
+        # Record the turn before rendering: a rerun triggered while the
+        # reply streams would otherwise drop it from the history.
+        messages = st.session_state.rag_messages
+        messages.extend(msg for _, msg in batch)
+        # Bound session memory for long conversations
+        messages[:] = messages[-Config.MAX_HISTORY:]
+
+        for i, msg in batch:
+            role, content = msg["role"], msg["content"]
 
             # Handle user input
             if role == "user_proxy":
@@ -248,26 +334,45 @@ class ChatManager:
                     else:
                         st.markdown(content)
 
+    def show_saved_messages(self, container) -> None:
+        """Replay rag_messages; agent answers were saved under agent names."""
+        for msg in st.session_state.rag_messages:
+            role = ("user" if msg["role"] in ["user", "user_proxy"]
+                    else "assistant")
+            container.chat_message(
+                role, avatar=msg["avatar"]).markdown(msg["content"])
+
+    def run(self):
+        UIHelper.config_page()
+        UIHelper.setup_sidebar()
+        # Skips the pause between streamed chunks in stream_response
+        st.sidebar.toggle("Fast responses", key="fast_mode")
+        st.title(f"💬 {self.user_name}")
+        st_c_chat = st.container(border=True)
+
+        self.show_saved_messages(st_c_chat)
+
+        # Prompt input
+        if prompt := st.chat_input(
+                placeholder=self.placeholderstr, key="rag_chat"):
+            history = self.generate_response(prompt)
+            self.show_chat_history(
+                [{"role": "user", "content": prompt}] + history, st_c_chat
+            )
+
 
-def stream_data(stream_str: str):
-    for word in stream_str.split(" "):
-        yield word + " "
-        time.sleep(0.05)
+def stream_data(stream_str: str, step: int = 10):
+    words = stream_str.split(" ")
+    delay = 0 if st.session_state.get("fast_mode") else 0.01
+    for i in range(0, len(words), step):
+        yield " ".join(words[i:i + step]) + " "
+        if delay:
+            time.sleep(delay)
 
 
 def save_lang():
     st.session_state['lang_setting'] = st.session_state.get("language_select")
 
 
-def run(self):
-    UIHelper.config_page()
-    UIHelper.setup_sidebar()
-    st.title(f"💬 {user_name}")
-    st_c_chat = st.container(border=True)
-    UIHelper.setup_chat(st_c_chat)
-    chat_manager = ChatManager()
-
-
 if __name__ == "__main__":
-    chatmanager = ChatManager()
-    chatmanager.run()
+    ChatManager().run()
@@ -2,6 +2,5 @@ import sys
 from pathlib import Path
 
 # Add project root to Python path for all tests
-project_root = Path(__file__).parent.parent
-if str(project_root) not in sys.path:
-    sys.path.insert(0, str(project_root))
+project_root = str(Path(__file__).parent.parent)
+sys.path[:] = [project_root] + [p for p in sys.path if p != project_root]
@@ -0,0 +1,223 @@
+import importlib
+import pytest
+from types import SimpleNamespace
+import streamlit.file_util as file_util  # type: ignore
+import streamlit as st  # type: ignore
+
+import pages.rag_agents as rag_agents
+importlib.reload(rag_agents)
+
+
+def setup_secrets(tmp_path, monkeypatch):
+    secret_file = tmp_path / 'secrets.toml'
+    secret_file.write_text(
+        'GEMINI1_API_KEY = "dummy"\n'
+        'GEMINI2_API_KEY = "dummy"'
+    )
+    monkeypatch.setattr(
+        file_util,
+        'get_project_streamlit_file_path',
+        lambda name: str(secret_file)
+    )
+    monkeypatch.setattr(
+        file_util, 'get_streamlit_file_path',
+        lambda name: str(secret_file)
+    )
+    importlib.reload(st.runtime.secrets)
+    monkeypatch.setattr(
+        'utils.llm_setup.LLMSetup.load_api_keys',
+        lambda: ("dummy", "dummy")
+    )
+    return secret_file
+
+
+class FakeAgent:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeProxy:
+    """Stands in for the user proxy and counts LLM round-trips."""
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    def initiate_chat(self, agent, message, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(chat_history=[
+            {"role": "assistant", "name": "user_proxy", "content": message},
+            {"role": "user", "name": agent.name, "content": self.reply},
+        ])
+
+
+class RecordingContainer:
+    """Records the bubble role of each rendered chat message."""
+    def __init__(self):
+        self.roles = []
+
+    def chat_message(self, role, **kwargs):
+        self.roles.append(role)
+        return self
+
+    def write(self, *args):
+        pass
+
+    def markdown(self, *args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+def make_chat_manager(monkeypatch, tmp_path, reply):
+    for key in ("rag_agents", "rag_messages", "rag_response_cache"):
+        if key in st.session_state:
+            del st.session_state[key]
+    proxy = FakeProxy(reply)
+    factory = rag_agents.AgentFactory
+    monkeypatch.setattr(factory, "create_graph_agent",
+                        lambda: FakeAgent("GraphRAG_Agent"))
+    monkeypatch.setattr(factory, "create_text_agent",
+                        lambda: FakeAgent("TextRAG_Agent"))
+    monkeypatch.setattr(factory, "create_user_proxy", lambda: proxy)
+    monkeypatch.setattr(
+        rag_agents.DocumentLoader, "BASE_DIRS",
+        {"personal": str(tmp_path / "personal"), "org": str(tmp_path / "org")}
+    )
+    return rag_agents.ChatManager(), proxy
+
+
+def test_is_org_related(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+
+    chat_manager = rag_agents.ChatManager
+
+    def is_org_related(prompt):
+        return chat_manager.is_org_related(chat_manager.tokenize(prompt))
+
+    assert is_org_related("Who is my Manager?")
+    assert is_org_related("who reports to the CTO")
+    assert is_org_related("which teams are in sales")
+    assert not is_org_related("how do i submit my timesheet")
+
+
+def test_should_stop(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+
+    should_stop = rag_agents.ChatManager.should_stop
+    sorry = {"role": "assistant", "name": "TextRAG_Agent",
+             "content": "I apologize, I cannot find that."}
+    answer = {"role": "assistant", "name": "TextRAG_Agent",
+              "content": "Timesheets are due on Friday."}
+    question = {"role": "user", "name": "user_proxy", "content": "hi"}
+    assert should_stop([question, sorry])
+    assert not should_stop([question, answer])
+    assert not should_stop([question])
+
+
+def test_generate_response_uses_category_tag(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+    chat_manager, proxy = make_chat_manager(
+        monkeypatch, tmp_path, "[CATEGORY: personal] Ask HR."
+    )
+
+    history = chat_manager.generate_response("who is my manager?")
+    assert proxy.calls == 1
+    assert history == [
+        {"role": "user", "name": "TextRAG_Agent", "content": "Ask HR."}
+    ]
+
+    container = RecordingContainer()
+    monkeypatch.setattr(st, "write_stream", lambda stream: "".join(stream))
+    chat_manager.show_chat_history(history, container)
+    assert container.roles == ["assistant"]
+    assert st.session_state.rag_messages[-1]["role"] == "TextRAG_Agent"
+
+
+def test_show_chat_history_records_before_rendering(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+    chat_manager, _ = make_chat_manager(monkeypatch, tmp_path, "")
+    monkeypatch.setattr(rag_agents.Config, "MAX_HISTORY", 2)
+
+    class InterruptedContainer:
+        def chat_message(self, *args, **kwargs):
+            raise RuntimeError("rerun")
+
+    history = [
+        {"role": "user", "content": "first"},
+        {"role": "user", "content": " "},
+        {"role": "user", "content": "second"},
+        {"role": "TextRAG_Agent", "content": "answer"},
+    ]
+    with pytest.raises(RuntimeError):
+        chat_manager.show_chat_history(history, InterruptedContainer())
+    assert [msg["content"] for msg in st.session_state.rag_messages] == [
+        "second", "answer"
+    ]
+
+
+def test_chat_reuses_cached_replies(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+    chat_manager, proxy = make_chat_manager(monkeypatch, tmp_path, "Friday.")
+    monkeypatch.setattr(rag_agents.Config, "RESPONSE_CACHE_SIZE", 2)
+    agent = chat_manager.text_agent
+
+    first = chat_manager._chat(agent, "a")
+    first[1]["content"] = "edited by caller"
+    assert chat_manager._chat(agent, "a")[1]["content"] == "Friday."
+    assert proxy.calls == 1
+
+    # "a" is the least recently used entry once "b" and "c" are added
+    chat_manager._chat(agent, "b")
+    chat_manager._chat(agent, "c")
+    assert proxy.calls == 3
+    chat_manager._chat(agent, "a")
+    assert proxy.calls == 4
+
+
+def test_chat_does_not_cache_unhelpful_replies(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+    chat_manager, proxy = make_chat_manager(
+        monkeypatch, tmp_path, "I apologize, please clarify."
+    )
+    agent = chat_manager.text_agent
+
+    chat_manager._chat(agent, "a")
+    chat_manager._chat(agent, "a")
+    assert proxy.calls == 2
+    assert not st.session_state.rag_response_cache
+
+
+def test_saved_agent_answers_replay_as_assistant(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+    chat_manager, _ = make_chat_manager(monkeypatch, tmp_path, "Friday.")
+    monkeypatch.setattr(st, "write_stream", lambda stream: "".join(stream))
+
+    prompt = "when are timesheets due?"
+    history = chat_manager.generate_response(prompt)
+    chat_manager.show_chat_history(
+        [{"role": "user", "content": prompt}] + history, RecordingContainer()
+    )
+
+    container = RecordingContainer()
+    chat_manager.show_saved_messages(container)
+    assert container.roles == ["user", "assistant"]
+
+
+def test_agent_answer_is_streamed_in_chunks(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+    answer = " ".join(f"w{n}" for n in range(25))
+    chat_manager, _ = make_chat_manager(monkeypatch, tmp_path, answer)
+    st.session_state.fast_mode = True
+    streamed = []
+    monkeypatch.setattr(st, "write_stream",
+                        lambda stream: streamed.extend(stream))
+
+    history = chat_manager.generate_response("when are timesheets due?")
+    chat_manager.show_chat_history(history, RecordingContainer())
+    del st.session_state.fast_mode
+    assert len(streamed) == 3
+    assert "".join(streamed).split() == answer.split()
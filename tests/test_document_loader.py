@@ -1,4 +1,4 @@
-
+import os
 import importlib
 import streamlit.file_util as file_util  # type: ignore
 import streamlit as st  # type: ignore
@@ -38,3 +38,67 @@ def test_load_documents(monkeypatch, tmp_path):
     assert 'org' in docs
     assert len(docs['personal']) >= 1
     assert len(docs['org']) >= 1
+
+
+def test_load_documents_rereads_changed_files(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+
+    personal = tmp_path / 'personal'
+    personal.mkdir()
+    note = personal / 'note.md'
+    note.write_text('first', encoding='utf-8')
+    monkeypatch.setattr(
+        rag_agents.DocumentLoader, 'BASE_DIRS',
+        {'personal': str(personal), 'org': str(tmp_path / 'missing')}
+    )
+
+    docs = rag_agents.DocumentLoader.load_documents()
+    assert docs['personal'] == {'note.md': 'first'}
+    assert docs['org'] == {}
+
+    note.write_text('second', encoding='utf-8')
+    os.utime(note, (1, 1))
+    docs = rag_agents.DocumentLoader.load_documents()
+    assert docs['personal'] == {'note.md': 'second'}
+
+    note.unlink()
+    docs = rag_agents.DocumentLoader.load_documents()
+    assert docs['personal'] == {}
+
+
+def test_load_sections(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+
+    personal = tmp_path / 'personal'
+    personal.mkdir()
+    (personal / 'a.md').write_text('alpha', encoding='utf-8')
+    monkeypatch.setattr(
+        rag_agents.DocumentLoader, 'BASE_DIRS',
+        {'personal': str(personal), 'org': str(tmp_path / 'missing')}
+    )
+
+    assert rag_agents.DocumentLoader.load_sections('personal') == (
+        '# a.md\nalpha'
+    )
+    assert rag_agents.DocumentLoader.load_sections('org') == ''
+
+    (personal / 'b.md').write_text('beta', encoding='utf-8')
+    sections = rag_agents.DocumentLoader.load_sections('personal')
+    assert sorted(sections.split('\n\n')) == ['# a.md\nalpha', '# b.md\nbeta']
+
+
+def test_load_category(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+
+    org = tmp_path / 'org'
+    org.mkdir()
+    (org / 'chart.md').write_text('chart', encoding='utf-8')
+    monkeypatch.setattr(
+        rag_agents.DocumentLoader, 'BASE_DIRS',
+        {'personal': str(tmp_path / 'missing'), 'org': str(org)}
+    )
+
+    assert rag_agents.DocumentLoader.load_category('org') == {
+        'chart.md': 'chart'
+    }
+    assert rag_agents.DocumentLoader.load_category('personal') == {}
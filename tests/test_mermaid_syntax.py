@@ -45,3 +45,20 @@ def test_extract_mermaid_blocks(monkeypatch, tmp_path):
     md = 'text\n```mermaid\nA-->B\n```\nmore\n```mermaid\nC-->D\n```'
     blocks = rag_agents.MermaidExtractor.extract_mermaid_blocks(md)
     assert blocks == ['A-->B\n', 'C-->D\n']
+
+
+def test_extract_diagrams(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+
+    md = 'text\n```mermaid\nA-->B\n```\nmore\n```mermaid\nC-->D\n```'
+    diagrams = rag_agents.MermaidExtractor.extract_diagrams(md)
+    assert diagrams == '```mermaid\nA-->B\n\n```\n\n```mermaid\nC-->D\n\n```'
+    assert rag_agents.MermaidExtractor.extract_diagrams('no charts') == ''
+
+
+def test_extract_mermaid_blocks_with_inline_backticks(monkeypatch, tmp_path):
+    setup_secrets(tmp_path, monkeypatch)
+
+    md = '```mermaid\nA["`x`"]-->B\n``\n```\n```mermaid\nunclosed'
+    blocks = rag_agents.MermaidExtractor.extract_mermaid_blocks(md)
+    assert blocks == ['A["`x`"]-->B\n``\n']
@@ -0,0 +1,96 @@
+import os
+import threading
+from typing import Dict, Tuple
+
+
+# Module-level cache of file path -> (mtime, content, section); files are
+# only re-read from disk when their modification time changes. ``section``
+# is the content under a "# <fname>" heading, built once per read.
+_CACHE: Dict[str, Tuple[float, str, str]] = {}
+# Directory path -> (file signature, joined sections)
+_JOINED: Dict[str, Tuple[tuple, str]] = {}
+# Streamlit runs each session's script on its own thread and the caches
+# are shared, so every access goes through this lock. Files are read
+# outside it.
+_LOCK = threading.Lock()
+
+
+class DocumentLoader:
+    """Handles loading of markdown documents from specified directories."""
+    BASE_DIRS = {
+        "personal": "uploaded_docs/personal",
+        "org": "uploaded_docs/org"
+    }
+
+    @staticmethod
+    def _scan_dir(path: str) -> Dict[str, Tuple[float, str, str]]:
+        """Return {fname: cache entry} for the markdown files in ``path``."""
+        entries = {}
+        seen = set()
+        with os.scandir(path) as it:
+            for entry in it:
+                if not (entry.name.endswith(".md") and entry.is_file()):
+                    continue
+                mtime = entry.stat().st_mtime
+                with _LOCK:
+                    cached = _CACHE.get(entry.path)
+                if cached is None or cached[0] != mtime:
+                    with open(entry.path, "r", encoding="utf-8",
+                              buffering=256 * 1024) as f:
+                        content = f.read()
+                    cached = (mtime, content, f"# {entry.name}\n{content}")
+                    with _LOCK:
+                        _CACHE[entry.path] = cached
+                entries[entry.name] = cached
+                seen.add(entry.path)
+
+        # Drop cache entries for files removed from this directory
+        with _LOCK:
+            for stale in [p for p in _CACHE
+                          if os.path.dirname(p) == path and p not in seen]:
+                del _CACHE[stale]
+        return entries
+
+    @staticmethod
+    def load_category(category: str) -> Dict[str, str]:
+        """Return {fname: content} for a single document category."""
+        path = DocumentLoader.BASE_DIRS[category]
+        if not os.path.exists(path):
+            return {}
+        return {fname: cached[1] for fname, cached
+                in DocumentLoader._scan_dir(path).items()}
+
+    @staticmethod
+    def load_documents() -> Dict[str, Dict[str, str]]:
+        return {category: DocumentLoader.load_category(category)
+                for category in DocumentLoader.BASE_DIRS}
+
+    @staticmethod
+    def load_sections(category: str) -> str:
+        """Return all documents of ``category`` as "# <fname>" sections.
+
+        The joined string is cached and only rebuilt when a file in the
+        category is added, removed or modified.
+        """
+        path = DocumentLoader.BASE_DIRS[category]
+        if not os.path.exists(path):
+            return ""
+        entries = DocumentLoader._scan_dir(path)
+        signature = tuple((fname, cached[0])
+                          for fname, cached in entries.items())
+        with _LOCK:
+            joined = _JOINED.get(path)
+        if joined is None or joined[0] != signature:
+            joined = (signature, "\n\n".join(
+                cached[2] for cached in entries.values()
+            ))
+            with _LOCK:
+                _JOINED[path] = joined
+        return joined[1]
+
+    @staticmethod
+    def invalidate() -> None:
+        """Clear the document cache, e.g. after a new upload."""
+        with _LOCK:
+            _CACHE.clear()
+            _JOINED.clear()
@@ -1,3 +1,4 @@
+import functools
 import streamlit as st  # type: ignore
 from dotenv import load_dotenv  # type: ignore
 from autogen import LLMConfig, AssistantAgent, UserProxyAgent  # type: ignore
@@ -6,8 +7,9 @@ from autogen.code_utils import content_str  # type: ignore
 
 class LLMSetup:
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def load_api_keys():
-        """Load API keys from environment and Streamlit secrets."""
+        """Load API keys from environment and Streamlit secrets (cached)."""
         load_dotenv(override=True)
         gemini1 = st.secrets["GEMINI1_API_KEY"]
         gemini2 = st.secrets["GEMINI2_API_KEY"]